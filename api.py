@@ -8,19 +8,27 @@ Configurable via environment variables for different clubs.
 
 import os
 import sqlite3
-import re
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+import hashlib
+from datetime import datetime, date, time as dtime, timezone
+from typing import List, Optional, Dict, NamedTuple, Tuple, Iterator
+from email.utils import formatdate, parsedate_to_datetime
 import asyncio
-from contextlib import asynccontextmanager
+import queue
+import random
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 import uvicorn
-from icalendar import Calendar, Event
 
-from gaa_fixtures_parser import GAAFixturesParser, parse_gaa_date
+from gaa_fixtures_parser import GAAFixturesParser
 # from caldav_server import CalDAVServer  # Not using the separate CalDAV server
 
 # Configuration from environment variables
@@ -29,6 +37,14 @@ COUNTY_BOARD_ID = os.getenv("COUNTY_BOARD_ID", "15")
 DB_PATH = os.getenv("DB_PATH", "fixtures.db")
 FETCH_INTERVAL = int(os.getenv("FETCH_INTERVAL_MINUTES", "60"))  # minutes
 PORT = int(os.getenv("PORT", "8000"))
+# Failed fetches are retried after 30s, doubling up to the regular interval, and
+# every wait gets up to a minute of jitter so replicas don't hit the site together
+FETCH_RETRY_SECONDS = 30
+FETCH_JITTER_SECONDS = 60
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))  # cached responses kept in memory
+# Each worker runs its own lifespan, so its own scraper and in-process caches
+WORKERS = int(os.getenv("WORKERS", "1"))
 
 # No authentication required for local/home use
 
@@ -56,36 +72,377 @@ class HealthResponse(BaseModel):
     county_board_id: str
     database_path: str
     last_update: Optional[str]
+    last_successful_fetch: Optional[str] = None
     total_fixtures: int
 
+class ConnectionPool:
+    """Pool of long-lived, read-only SQLite connections shared across requests
+
+    The endpoints only ever read; the parser writes through its own connections,
+    and the database is in WAL mode so readers run alongside its writes.
+    """
+    
+    # Applied to every pooled connection
+    PRAGMAS = (
+        "PRAGMA query_only=1",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-128000",
+        "PRAGMA mmap_size=1073741824",  # Serve pages straight from a mapping of up to 1GB
+    )
+    
+    def __init__(self, db_path: str, size: int = 4):
+        self.db_path = db_path
+        self.size = size
+        self._pool: queue.Queue = queue.Queue(maxsize=size)
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Rows stay plain tuples; callers unpack them in FIXTURE_FIELDS order.
+        # Autocommit mode: reads never need the module's implicit transactions.
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def warm(self):
+        """Open every connection up front so requests never pay for the connect"""
+        while not self._pool.full():
+            conn = self._connect()
+            # Touching the table makes SQLite read the schema now rather than on first use
+            conn.execute("SELECT 1 FROM fixtures LIMIT 1").fetchall()
+            self._pool.put_nowait(conn)
+    
+    def get(self) -> sqlite3.Connection:
+        return self._pool.get()
+    
+    def put(self, conn: sqlite3.Connection):
+        self._pool.put(conn)
+    
+    @contextmanager
+    def acquire(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, returning it to the pool afterwards"""
+        conn = self.get()
+        try:
+            yield conn
+        finally:
+            self.put(conn)
+    
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+class DataVersion(NamedTuple):
+    """Identifies the current fixtures data; rows are only ever inserted"""
+    token: str
+    last_modified: float
+
+_today_cache = (-1, "")
+
+def today_iso() -> str:
+    """Today's local date as YYYY-MM-DD, recomputed at most once a minute"""
+    global _today_cache
+    minute = int(time.time() // 60)
+    if _today_cache[0] != minute:
+        _today_cache = (minute, date.today().isoformat())
+    return _today_cache[1]
+
+class CalendarSnapshot(NamedTuple):
+    """Pre-rendered default calendar feed (upcoming fixtures, no filters)"""
+    day: str
+    body: bytes
+    etag: str
+    last_modified: str
+
+class ResponseCache:
+    """In-process cache of serialized responses, cleared whenever fixtures refresh
+
+    Entries are keyed by the request's ETag, which already covers the data
+    version, today's date and the URL. A render that finishes after a refresh
+    lands under the old version's key and is never served again.
+    
+    Query strings are arbitrary (cache-busting params, any venue text), so the
+    cache holds at most maxsize entries and evicts the least recently used.
+    
+    tee() stores from Starlette's threadpool (StreamingResponse iterates sync
+    generators there) while get() runs on the event loop, so every access to
+    the entries happens under a lock.
+    """
+    
+    def __init__(self, ttl_seconds: float, maxsize: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Response]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, body, media_type, headers = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return Response(content=body, media_type=media_type, headers=headers)
+    
+    def _store(self, key: str, body: bytes, media_type: Optional[str], headers: Optional[Dict[str, str]]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body, media_type, headers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def put(self, key: str, response: Response, headers: Optional[Dict[str, str]] = None) -> Response:
+        """Store an already-rendered response and hand it back to the caller"""
+        self._store(key, response.body, response.media_type, headers)
+        return response
+    
+    def tee(
+        self, key: str, chunks: Iterator[bytes], media_type: str, headers: Dict[str, str]
+    ) -> Iterator[bytes]:
+        """Pass a streamed body through, caching it once it has been sent in full"""
+        body = []
+        for chunk in chunks:
+            body.append(chunk)
+            yield chunk
+        self._store(key, b"".join(body), media_type, headers)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Precomposed WHERE clauses keyed by (include_past, filter column). Keeping every
+# query shape a fixed string lets sqlite3's per-connection statement cache reuse
+# the prepared statement instead of re-parsing SQL on each request.
+WHERE_CLAUSES = {
+    (False, None): "WHERE date_parsed >= ?",
+    (True, None): "",
+    (False, "venue"): "WHERE venue LIKE ? AND date_parsed >= ?",
+    (True, "venue"): "WHERE venue LIKE ?",
+    (False, "competition"): "WHERE competition = ? AND date_parsed >= ?",
+    (True, "competition"): "WHERE competition = ?",
+}
+ORDER_BY = "ORDER BY date_parsed ASC, time ASC"
+
+# Columns exposed by FixtureResponse, so rows can be returned as dicts directly
+FIXTURE_FIELDS = ("id", "date", "competition", "home_team", "away_team", "time", "venue", "referee", "created_at")
+FIXTURE_COLUMNS = ", ".join(FIXTURE_FIELDS)
+
+COUNT_SQL = {key: f"SELECT COUNT(*) FROM fixtures {where}" for key, where in WHERE_CLAUSES.items()}
+# The window count rides along on every row so one statement yields both the page and the total
+PAGE_SQL = {
+    key: f"SELECT {FIXTURE_COLUMNS}, COUNT(*) OVER () AS _total FROM fixtures {where} {ORDER_BY} LIMIT ? OFFSET ?"
+    for key, where in WHERE_CLAUSES.items()
+}
+# Events read the start/end timestamps computed at save time instead of date/time text
+CALENDAR_FIELDS = ("id", "competition", "home_team", "away_team", "venue", "referee", "created_at", "start_ts", "end_ts")
+CALENDAR_COLUMNS = ", ".join(CALENDAR_FIELDS)
+CALENDAR_SQL = {
+    key: f"SELECT {CALENDAR_COLUMNS} FROM fixtures {where} {ORDER_BY} LIMIT 200"
+    for key, where in WHERE_CLAUSES.items()
+    if key[1] != "competition"
+}
+FIXTURE_BY_ID_SQL = f"SELECT {FIXTURE_COLUMNS} FROM fixtures WHERE id = ?"
+# Summary tables maintained by the parser's save_fixtures
+VENUES_SQL = "SELECT name FROM venues ORDER BY name"
+COMPETITIONS_SQL = "SELECT name FROM competitions ORDER BY name"
+
+def fixture_filter(include_past: bool, column: Optional[str] = None, value: Optional[str] = None):
+    """WHERE_CLAUSES key and bound parameters for the given filters"""
+    params = []
+    if not value:
+        column = None
+    elif column == "venue":
+        params.append(f"%{value}%")  # Venue filters are partial matches
+    else:
+        params.append(value)
+    # By default, only show today and future games (exclude past games)
+    if not include_past:
+        params.append(today_iso())
+    return (bool(include_past), column), params
+
 # Global parser instance
 parser: Optional[GAAFixturesParser] = None
 
+# Rendered responses; fixtures only change when the background fetch runs
+response_cache = ResponseCache(ttl_seconds=FETCH_INTERVAL * 60, maxsize=RESPONSE_CACHE_SIZE)
+
+# Default calendar feed, re-rendered after each fetch rather than per request
+calendar_snapshot: Optional[CalendarSnapshot] = None
+calendar_snapshot_lock = asyncio.Lock()
+
+# Serialises parser.run between the scheduler and manual refreshes
+fetch_lock = asyncio.Lock()
+
+# Version of the fixtures data, used to derive ETag/Last-Modified validators
+data_version: Optional[DataVersion] = None
+
+# Shared read connection pool (the parser keeps its own write connections)
+pool: Optional[ConnectionPool] = None
+
+# sqlite3 is blocking, so queries run on their own threads (one per pooled
+# connection) and the scraper gets a single thread that never competes with them.
+# Both are created in lifespan alongside the pool.
+db_executor: Optional[ThreadPoolExecutor] = None
+fetch_executor: Optional[ThreadPoolExecutor] = None
+
+def _with_connection(fn, *args):
+    with pool.acquire() as conn:
+        return fn(conn, *args)
+
+async def run_db(fn, *args):
+    """Run fn(conn, *args) on one pooled connection without blocking the event loop
+
+    Everything a request needs from the database goes through a single call, so
+    it borrows one connection and makes one trip to the DB thread pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, _with_connection, fn, *args)
+
+def _select(conn: sqlite3.Connection, sql: str, params=()) -> list:
+    return conn.execute(sql, params).fetchall()
+
+async def _fetch_rows(sql: str, params=()) -> list:
+    """Run a single read query on a pooled connection"""
+    return await run_db(_select, sql, params)
+
+async def _query_fixtures(
+    *,
+    include_past: bool,
+    column: Optional[str] = None,
+    value: Optional[str] = None,
+    limit: Optional[int],
+    offset: Optional[int]
+) -> Tuple[List[dict], int]:
+    """Fetch one page of fixtures as dicts, plus the total number matching"""
+    key, params = fixture_filter(include_past, column, value)
+    rows, total_count = await run_db(_fetch_page, key, params, limit, offset)
+    
+    # Rows come from our own database, so skip per-row model validation
+    return [dict(zip(FIXTURE_FIELDS, row)) for row in rows], total_count
+
+def _fetch_page(conn: sqlite3.Connection, key: tuple, params: list, limit, offset) -> Tuple[list, int]:
+    rows = conn.execute(PAGE_SQL[key], params + [limit, offset]).fetchall()
+    if rows:
+        return rows, rows[0][-1]  # _total is the last column
+    if offset or not limit:
+        # Paged past the end (or asked for no rows): there is no row to carry the
+        # window count, so ask for it
+        return rows, conn.execute(COUNT_SQL[key], params).fetchone()[0]
+    return rows, 0
+
+def fixtures_list_response(validators: Dict[str, str], fixtures: List[dict], total_count: int) -> Response:
+    """Render a FixturesListResponse body and keep it in the response cache"""
+    result = {
+        "fixtures": fixtures,
+        "total_count": total_count,
+        "club_id": CLUB_ID,
+        "county_board_id": COUNTY_BOARD_ID
+    }
+    response = ORJSONResponse(content=result, headers=validators)
+    return response_cache.put(validators["ETag"], response, validators)
+
 # CalDAV server instance
 # caldav_server: Optional[CalDAVServer] = None
 
-async def fetch_fixtures_background():
-    """Background task to periodically fetch fixtures"""
+def _load_data_version(conn: sqlite3.Connection) -> DataVersion:
+    last_update, total = conn.execute("SELECT MAX(created_at), COUNT(*) FROM fixtures").fetchone()
+    # created_at is written with datetime.now(), i.e. local time
+    last_modified = datetime.fromisoformat(last_update).timestamp() if last_update else 0.0
+    return DataVersion(token=f"{last_update}|{total}", last_modified=last_modified)
+
+async def refresh_data_version() -> DataVersion:
+    global data_version
+    data_version = await run_db(_load_data_version)
+    return data_version
+
+_last_modified_cache: Tuple[Optional[tuple], str] = (None, "")
+
+def _last_modified() -> str:
+    """Last-Modified for the current data and day, formatted once per change of either"""
+    global _last_modified_cache
+    key = (data_version, today_iso())
+    if _last_modified_cache[0] != key:
+        # Views that hide past fixtures change at midnight even without new data
+        midnight = datetime.combine(date.today(), dtime.min).timestamp()
+        _last_modified_cache = (key, formatdate(max(data_version.last_modified, midnight), usegmt=True))
+    return _last_modified_cache[1]
+
+def response_validators(request: Request) -> Dict[str, str]:
+    """ETag and Last-Modified for a GET, derived from the data version and URL"""
+    seed = f"{data_version.token} {today_iso()} {request.url.path}?{request.url.query}"
+    return {
+        "ETag": f'"{hashlib.md5(seed.encode()).hexdigest()}"',
+        "Last-Modified": _last_modified(),
+    }
+
+def conditional_response(request: Request, validators: Dict[str, str]) -> Optional[Response]:
+    """Return a 304 when the client's cached copy is still current, otherwise None"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" not in tags and validators["ETag"] not in tags:
+            return None
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        if not if_modified_since:
+            return None
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            if since < parsedate_to_datetime(validators["Last-Modified"]):
+                return None
+        except (TypeError, ValueError):
+            return None
+    return Response(status_code=304, headers=validators)
+
+async def fetch_fixtures_background() -> bool:
+    """Background task to periodically fetch fixtures; returns False if the fetch failed"""
     global parser
-    if parser:
+    if not parser:
+        return False
+    # A manual refresh during a scheduled one (or vice versa) would just repeat it
+    if fetch_lock.locked():
+        print("Fixtures fetch already in progress, skipping")
+        return True
+    async with fetch_lock:
         try:
-            await asyncio.get_event_loop().run_in_executor(None, parser.run)
+            await asyncio.get_running_loop().run_in_executor(fetch_executor, parser.run)
         except Exception as e:
             print(f"Error fetching fixtures: {e}")
+            return False
+        response_cache.clear()
+        return await refresh_derived_state()
+
+async def refresh_derived_state() -> bool:
+    """Reload the data version and default calendar; returns False if either failed
+
+    Errors are logged rather than raised, so a bad row can't stop the app from
+    starting or end the background fetch loop.
+    """
+    try:
+        await refresh_data_version()
+        await refresh_calendar_snapshot()
+    except Exception as e:
+        print(f"Error refreshing cached fixtures state: {e}")
+        return False
+    return True
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global parser
+    global parser, pool, db_executor, fetch_executor
     
     # Startup
     parser = GAAFixturesParser(db_path=DB_PATH, club_id=CLUB_ID, county_board_id=COUNTY_BOARD_ID)
+    pool = ConnectionPool(parser.db_path, size=DB_POOL_SIZE)
+    pool.warm()
+    db_executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="db")
+    fetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fetch")
     
-    # Initial fetch
-    try:
-        await asyncio.get_event_loop().run_in_executor(None, parser.run)
-    except Exception as e:
-        print(f"Initial fetch failed: {e}")
+    # Serve whatever is already in the database; the initial fetch runs in the
+    # background so the server accepts traffic without waiting on the scrape
+    await refresh_derived_state()
     
     # Schedule background task
     task = asyncio.create_task(schedule_background_fetch())
@@ -94,21 +451,47 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     task.cancel()
+    db_executor.shutdown(wait=True)
+    fetch_executor.shutdown(wait=False, cancel_futures=True)
+    pool.close()
 
 async def schedule_background_fetch():
     """Schedule periodic background fetching"""
+    loop = asyncio.get_running_loop()
+    interval = FETCH_INTERVAL * 60  # Convert minutes to seconds
+    # Deadlines are taken from the monotonic loop clock when each fetch starts,
+    # so time spent scraping doesn't push the schedule back. The first fetch
+    # happens straight away.
+    deadline = loop.time()
+    failures = 0
     while True:
-        await asyncio.sleep(FETCH_INTERVAL * 60)  # Convert minutes to seconds
-        await fetch_fixtures_background()
+        await asyncio.sleep(max(0, deadline - loop.time()))
+        started = loop.time()
+        if await fetch_fixtures_background():
+            failures = 0
+            delay = interval
+        else:
+            # Back off exponentially so an outage doesn't wait a full interval per retry
+            delay = min(interval, FETCH_RETRY_SECONDS * 2 ** failures)
+            failures += 1
+        deadline = started + delay + random.uniform(0, FETCH_JITTER_SECONDS)
 
 # Create FastAPI app
 app = FastAPI(
     title="GAA Fixtures API",
     description="REST API for GAA fixtures data",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+# Fixture lists and iCal feeds are repetitive text; empty 304s fall under the threshold
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+def _health_stats(conn: sqlite3.Connection) -> Tuple[int, Optional[str]]:
+    # Both aggregates come from a single pass over the table
+    return conn.execute("SELECT COUNT(*), MAX(created_at) FROM fixtures").fetchone()
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
@@ -119,16 +502,8 @@ async def health_check():
     
     # Get fixture count and last update from database
     try:
-        conn = sqlite3.connect(parser.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM fixtures")
-        total_fixtures = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT MAX(created_at) FROM fixtures")
-        last_update = cursor.fetchone()[0]
-        
-        conn.close()
+        total_fixtures, last_update = await run_db(_health_stats)
+        last_success_ts = parser.last_success_ts
         
         return HealthResponse(
             status="healthy",
@@ -136,13 +511,15 @@ async def health_check():
             county_board_id=COUNTY_BOARD_ID,
             database_path=DB_PATH,
             last_update=last_update,
+            last_successful_fetch=datetime.fromtimestamp(last_success_ts).isoformat() if last_success_ts else None,
             total_fixtures=total_fixtures
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-@app.get("/fixtures", response_model=FixturesListResponse)
+@app.get("/fixtures", response_model=None, responses={200: {"model": FixturesListResponse}})
 async def get_fixtures(
+    request: Request,
     limit: Optional[int] = 50,
     offset: Optional[int] = 0,
     include_past: Optional[bool] = False,
@@ -154,72 +531,171 @@ async def get_fixtures(
     if not parser:
         raise HTTPException(status_code=503, detail="Parser not initialised")
     
+    validators = response_validators(request)
+    not_modified = conditional_response(request, validators)
+    if not_modified:
+        return not_modified
+    
+    cached = response_cache.get(validators["ETag"])
+    if cached:
+        return cached
+    
     try:
-        conn = sqlite3.connect(parser.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Build query based on filters
-        where_conditions = []
-        params = []
-        
-        # By default, only show today and future games (exclude past games)
-        if not include_past:
-            today = datetime.now().strftime("%Y-%m-%d")
-            where_conditions.append("date_parsed >= ?")
-            params.append(today)
-        
-        if venue:
-            where_conditions.append("venue LIKE ?")
-            params.append(f"%{venue}%")
-        
-        where_clause = ""
-        if where_conditions:
-            where_clause = "WHERE " + " AND ".join(where_conditions)
-        
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM fixtures {where_clause}"
-        cursor.execute(count_query, params)
-        total_count = cursor.fetchone()[0]
-        
-        # Get fixtures with pagination, sorted by parsed date
-        query = f"""
-            SELECT * FROM fixtures 
-            {where_clause}
-            ORDER BY date_parsed ASC, time ASC
-            LIMIT ? OFFSET ?
-        """
-        params.extend([limit, offset])
-        cursor.execute(query, params)
-        
-        fixtures = []
-        for row in cursor.fetchall():
-            fixtures.append(FixtureResponse(
-                id=row['id'],
-                date=row['date'],
-                competition=row['competition'],
-                home_team=row['home_team'],
-                away_team=row['away_team'],
-                time=row['time'],
-                venue=row['venue'],
-                referee=row['referee'],
-                created_at=row['created_at']
-            ))
-        
-        conn.close()
-        
-        return FixturesListResponse(
-            fixtures=fixtures,
-            total_count=total_count,
-            club_id=CLUB_ID,
-            county_board_id=COUNTY_BOARD_ID
+        fixtures, total_count = await _query_fixtures(
+            include_past=include_past, column="venue", value=venue, limit=limit, offset=offset
         )
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    return fixtures_list_response(validators, fixtures, total_count)
+
+CALENDAR_MEDIA_TYPE = "text/calendar; charset=utf-8"
+
+# VCALENDAR wrapper only depends on configuration, so it is written out once
+CALENDAR_HEADER = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    f"PRODID:-//GAA Fixtures API Club {CLUB_ID}//EN\r\n"
+    "CALSCALE:GREGORIAN\r\n"
+    "METHOD:PUBLISH\r\n"
+    f"X-WR-CALNAME:GAA Fixtures - Club {CLUB_ID}\r\n"
+    f"X-WR-CALDESC:GAA fixtures for club {CLUB_ID}\r\n"
+).encode()
+CALENDAR_FOOTER = b"END:VCALENDAR\r\n"
+
+# RFC 5545 TEXT escaping: backslash, semicolon, comma and newline. CRs are
+# dropped, so CRLF from the scraped HTML becomes a single escaped newline.
+_ICAL_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n", "\r": ""})
+_ICAL_DATETIME_FMT = "%Y%m%dT%H%M%S"
+_ICAL_FOLD_OCTETS = 75
+
+def _ical_timestamp(ts: int) -> str:
+    # start_ts/end_ts encode local wall-clock time as if it were UTC, which
+    # gmtime turns back into the floating DTSTART/DTEND the calendar uses
+    return time.strftime(_ICAL_DATETIME_FMT, time.gmtime(ts))
+
+def _ical_text(value: str) -> str:
+    return value.translate(_ICAL_TEXT_ESCAPES)
+
+def _ical_line(line: str) -> str:
+    """Fold a content line at 75 octets without splitting a UTF-8 sequence"""
+    if len(line) <= _ICAL_FOLD_OCTETS and line.isascii():
+        return line
+    if len(line.encode()) <= _ICAL_FOLD_OCTETS:
+        return line
+    
+    parts = []
+    start = 0
+    size = 0
+    limit = _ICAL_FOLD_OCTETS
+    for i, char in enumerate(line):
+        width = len(char.encode())
+        if size + width > limit:
+            parts.append(line[start:i])
+            start = i
+            size = 0
+            limit = _ICAL_FOLD_OCTETS - 1  # continuation lines start with a space
+        size += width
+    parts.append(line[start:])
+    return "\r\n ".join(parts)
+
+def iter_calendar(fixtures: list) -> Iterator[bytes]:
+    """Yield fixture rows as an iCal document, one VEVENT at a time"""
+    yield CALENDAR_HEADER
+    
+    # DTSTAMP and LAST-MODIFIED are the render time, shared by every event;
+    # RFC 5545 requires both in UTC form
+    now = f"{datetime.now(timezone.utc).strftime(_ICAL_DATETIME_FMT)}Z"
+    
+    for fixture_id, competition, home_team, away_team, venue, referee, created_at, start_ts, end_ts in fixtures:
+        if start_ts is None:
+            # Skip events with unparseable dates
+            continue
+        
+        description = f"Competition: {competition}\nVenue: {venue}\nReferee: {referee}"
+        created = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        # The competition's first word (e.g. "Minor") is a category, if there is one
+        categories = ",".join(
+            _ical_text(category) for category in ('GAA', 'Hurling', 'Football', *competition.split()[:1])
+        )
+        
+        lines = (
+            "BEGIN:VEVENT",
+            _ical_line(f"SUMMARY:{_ical_text(f'{home_team} v {away_team}')}"),
+            f"DTSTART:{_ical_timestamp(start_ts)}",
+            f"DTEND:{_ical_timestamp(end_ts)}",
+            f"DTSTAMP:{now}",
+            f"UID:gaa-fixture-{fixture_id}@club-{CLUB_ID}.gaa",
+            _ical_line(f"CATEGORIES:{categories}"),
+            f"CREATED:{created.strftime(_ICAL_DATETIME_FMT)}Z",  # RFC 5545 requires UTC form
+            _ical_line(f"DESCRIPTION:{_ical_text(description)}"),
+            f"LAST-MODIFIED:{now}",
+            _ical_line(f"LOCATION:{_ical_text(venue)}"),
+            "END:VEVENT",
+            "",
+        )
+        yield "\r\n".join(lines).encode()
+    
+    yield CALENDAR_FOOTER
+
+def build_calendar(fixtures: list) -> bytes:
+    """Render fixture rows as a complete iCal document"""
+    return b"".join(iter_calendar(fixtures))
+
+# Calendar headers that only depend on configuration, built once at import
+CALENDAR_STATIC_HEADERS = {
+    "Content-Disposition": f"inline; filename=gaa-fixtures-club-{CLUB_ID}.ics",
+    "Cache-Control": "max-age=1800",  # Cache for 30 minutes
+}
+
+def calendar_headers(etag: str, last_modified: str) -> Dict[str, str]:
+    return {**CALENDAR_STATIC_HEADERS, "ETag": etag, "Last-Modified": last_modified}
+
+def _render_calendar(conn: sqlite3.Connection, key: tuple, params: list) -> bytes:
+    return build_calendar(conn.execute(CALENDAR_SQL[key], params).fetchall())
+
+def _default_calendar_etag(day: str) -> str:
+    # Derived from the data version rather than the body, whose DTSTAMPs change
+    # on every render, so clients keep getting 304s until the fixtures change
+    seed = f"{data_version.token} {day} /fixtures/calendar.ics"
+    return f'"{hashlib.md5(seed.encode()).hexdigest()}"'
+
+def _render_default_calendar(conn: sqlite3.Connection) -> CalendarSnapshot:
+    day = today_iso()
+    key, params = fixture_filter(include_past=False)
+    return CalendarSnapshot(
+        day=day,
+        body=_render_calendar(conn, key, params),
+        etag=_default_calendar_etag(day),
+        last_modified=_last_modified()
+    )
+
+async def refresh_calendar_snapshot() -> CalendarSnapshot:
+    """Re-render the default calendar feed off the event loop, unless nothing has changed"""
+    global calendar_snapshot
+    snapshot = calendar_snapshot
+    day = today_iso()
+    if snapshot is not None and snapshot.day == day and snapshot.etag == _default_calendar_etag(day):
+        return snapshot
+    calendar_snapshot = await run_db(_render_default_calendar)
+    return calendar_snapshot
+
+async def current_calendar_snapshot() -> CalendarSnapshot:
+    """Return the default calendar, re-rendering it at most once when it goes stale"""
+    snapshot = calendar_snapshot
+    today = today_iso()
+    if snapshot is not None and snapshot.day == today:
+        return snapshot
+    # Concurrent requests after midnight share a single render
+    async with calendar_snapshot_lock:
+        snapshot = calendar_snapshot
+        if snapshot is None or snapshot.day != today:
+            snapshot = await refresh_calendar_snapshot()
+    return snapshot
 
 @app.get("/fixtures/calendar.ics")
 async def get_fixtures_calendar(
+    request: Request,
     include_past: Optional[bool] = False,
     venue: Optional[str] = None
 ):
@@ -229,155 +705,100 @@ async def get_fixtures_calendar(
     if not parser:
         raise HTTPException(status_code=503, detail="Parser not initialised")
     
-    try:
-        conn = sqlite3.connect(parser.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Build query based on filters
-        where_conditions = []
-        params = []
-        
-        # By default, only show today and future games
-        if not include_past:
-            today = datetime.now().strftime("%Y-%m-%d")
-            where_conditions.append("date_parsed >= ?")
-            params.append(today)
-        
-        if venue:
-            where_conditions.append("venue LIKE ?")
-            params.append(f"%{venue}%")
-        
-        where_clause = ""
-        if where_conditions:
-            where_clause = "WHERE " + " AND ".join(where_conditions)
-        
-        # Get fixtures
-        query = f"""
-            SELECT * FROM fixtures 
-            {where_clause}
-            ORDER BY date_parsed ASC, time ASC
-            LIMIT 200
-        """
-        cursor.execute(query, params)
-        fixtures = cursor.fetchall()
-        conn.close()
-        
-        # Create iCal calendar
-        cal = Calendar()
-        cal.add('prodid', f'-//GAA Fixtures API Club {CLUB_ID}//EN')
-        cal.add('version', '2.0')
-        cal.add('calscale', 'GREGORIAN')
-        cal.add('method', 'PUBLISH')
-        cal.add('x-wr-calname', f'GAA Fixtures - Club {CLUB_ID}')
-        cal.add('x-wr-caldesc', f'GAA fixtures for club {CLUB_ID}')
-        
-        for fixture in fixtures:
-            event = Event()
-            
-            # Event summary (title)
-            summary = f"{fixture['home_team']} v {fixture['away_team']}"
-            event.add('summary', summary)
-            
-            # Event description
-            description_parts = [
-                f"Competition: {fixture['competition']}",
-                f"Venue: {fixture['venue']}",
-                f"Referee: {fixture['referee']}"
-            ]
-            event.add('description', '\n'.join(description_parts))
-            
-            # Location
-            event.add('location', fixture['venue'])
-            
-            # Parse date/time
-            try:
-                start_dt = parse_gaa_datetime(fixture['date'], fixture['time'])
-                end_dt = start_dt + timedelta(hours=2)  # Assume 2-hour duration
-                
-                event.add('dtstart', start_dt)
-                event.add('dtend', end_dt)
-            except Exception as e:
-                # Skip events with unparseable dates
-                continue
-            
-            # Unique ID
-            event.add('uid', f"gaa-fixture-{fixture['id']}@club-{CLUB_ID}.gaa")
-            
-            # Creation and modification timestamps
-            now = datetime.now()
-            event.add('dtstamp', now)
-            event.add('created', datetime.fromisoformat(fixture['created_at'].replace('Z', '+00:00')))
-            event.add('last-modified', now)
-            
-            # Categories
-            event.add('categories', ['GAA', 'Hurling', 'Football', fixture['competition'].split()[0]])
-            
-            cal.add_component(event)
-        
-        # Return iCal content
-        ical_content = cal.to_ical().decode('utf-8')
-        
+    # The unfiltered feed is what Home Assistant polls; serve the pre-rendered copy
+    if not include_past and not venue:
+        snapshot = await current_calendar_snapshot()
+        not_modified = conditional_response(
+            request, {"ETag": snapshot.etag, "Last-Modified": snapshot.last_modified}
+        )
+        if not_modified:
+            return not_modified
         return Response(
-            content=ical_content,
-            media_type="text/calendar; charset=utf-8",
-            headers={
-                "Content-Disposition": f"inline; filename=gaa-fixtures-club-{CLUB_ID}.ics",
-                "Cache-Control": "max-age=1800",  # Cache for 30 minutes
-                "ETag": f'"gaa-fixtures-{CLUB_ID}-{len(fixtures)}"',
-                "Last-Modified": datetime.now().strftime("%a, %d %b %Y %H:%M:%S GMT")
-            }
+            content=snapshot.body,
+            media_type=CALENDAR_MEDIA_TYPE,
+            headers=calendar_headers(snapshot.etag, snapshot.last_modified)
         )
-        
+    
+    validators = response_validators(request)
+    not_modified = conditional_response(request, validators)
+    if not_modified:
+        return not_modified
+    
+    cached = response_cache.get(validators["ETag"])
+    if cached:
+        return cached
+    
+    try:
+        key, params = fixture_filter(include_past, "venue", venue)
+        fixtures = await _fetch_rows(CALENDAR_SQL[key], params)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Calendar generation error: {str(e)}")
+    
+    # Stream events as they are encoded; the full body is cached once sent
+    headers = calendar_headers(validators["ETag"], validators["Last-Modified"])
+    return StreamingResponse(
+        response_cache.tee(validators["ETag"], iter_calendar(fixtures), CALENDAR_MEDIA_TYPE, headers),
+        media_type=CALENDAR_MEDIA_TYPE,
+        headers=headers
+    )
 
 @app.get("/fixtures/venues")
-async def get_venues():
+async def get_venues(request: Request):
     """Get list of available venues"""
     global parser
     
     if not parser:
         raise HTTPException(status_code=503, detail="Parser not initialised")
     
+    validators = response_validators(request)
+    not_modified = conditional_response(request, validators)
+    if not_modified:
+        return not_modified
+    
+    cached = response_cache.get(validators["ETag"])
+    if cached:
+        return cached
+    
     try:
-        conn = sqlite3.connect(parser.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT DISTINCT venue FROM fixtures WHERE venue != '' ORDER BY venue")
-        venues = [row[0] for row in cursor.fetchall()]
+        rows = await _fetch_rows(VENUES_SQL)
+        venues = [row[0] for row in rows]
         
-        conn.close()
-        
-        return {"venues": venues}
+        response = ORJSONResponse(content={"venues": venues}, headers=validators)
+        return response_cache.put(validators["ETag"], response, validators)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/fixtures/competitions")
-async def get_competitions():
+async def get_competitions(request: Request):
     """Get list of available competitions"""
     global parser
     
     if not parser:
         raise HTTPException(status_code=503, detail="Parser not initialised")
     
+    validators = response_validators(request)
+    not_modified = conditional_response(request, validators)
+    if not_modified:
+        return not_modified
+    
+    cached = response_cache.get(validators["ETag"])
+    if cached:
+        return cached
+    
     try:
-        conn = sqlite3.connect(parser.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT DISTINCT competition FROM fixtures ORDER BY competition")
-        competitions = [row[0] for row in cursor.fetchall()]
-        
-        conn.close()
+        rows = await _fetch_rows(COMPETITIONS_SQL)
+        competitions = [row[0] for row in rows]
         
-        return {"competitions": competitions}
+        response = ORJSONResponse(content={"competitions": competitions}, headers=validators)
+        return response_cache.put(validators["ETag"], response, validators)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-@app.get("/fixtures/by-venue/{venue}")
+@app.get("/fixtures/by-venue/{venue}", responses={200: {"model": FixturesListResponse}})
 async def get_fixtures_by_venue(
+    request: Request,
     venue: str,
     limit: Optional[int] = 50,
     offset: Optional[int] = 0,
@@ -389,66 +810,30 @@ async def get_fixtures_by_venue(
     if not parser:
         raise HTTPException(status_code=503, detail="Parser not initialised")
     
+    validators = response_validators(request)
+    not_modified = conditional_response(request, validators)
+    if not_modified:
+        return not_modified
+    
+    cached = response_cache.get(validators["ETag"])
+    if cached:
+        return cached
+    
     try:
-        conn = sqlite3.connect(parser.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Build where conditions
-        where_conditions = ["venue LIKE ?"]
-        params = [f"%{venue}%"]
-        
-        # By default, only show today and future games (exclude past games)
-        if not include_past:
-            today = datetime.now().strftime("%Y-%m-%d")
-            where_conditions.append("date_parsed >= ?")
-            params.append(today)
-        
-        where_clause = "WHERE " + " AND ".join(where_conditions)
-        
-        # Get total count
-        cursor.execute(f"SELECT COUNT(*) FROM fixtures {where_clause}", params)
-        total_count = cursor.fetchone()[0]
-        
-        if total_count == 0:
-            raise HTTPException(status_code=404, detail="No fixtures found for this venue")
-        
-        # Get fixtures
-        cursor.execute(f"""
-            SELECT * FROM fixtures 
-            {where_clause}
-            ORDER BY date_parsed ASC, time ASC
-            LIMIT ? OFFSET ?
-        """, params + [limit, offset])
-        
-        fixtures = []
-        for row in cursor.fetchall():
-            fixtures.append(FixtureResponse(
-                id=row['id'],
-                date=row['date'],
-                competition=row['competition'],
-                home_team=row['home_team'],
-                away_team=row['away_team'],
-                time=row['time'],
-                venue=row['venue'],
-                referee=row['referee'],
-                created_at=row['created_at']
-            ))
-        
-        conn.close()
-        
-        return FixturesListResponse(
-            fixtures=fixtures,
-            total_count=total_count,
-            club_id=CLUB_ID,
-            county_board_id=COUNTY_BOARD_ID
+        fixtures, total_count = await _query_fixtures(
+            include_past=include_past, column="venue", value=venue, limit=limit, offset=offset
         )
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    if total_count == 0:
+        raise HTTPException(status_code=404, detail="No fixtures found for this venue")
+    
+    return fixtures_list_response(validators, fixtures, total_count)
 
-@app.get("/fixtures/by-competition/{competition}")
+@app.get("/fixtures/by-competition/{competition}", responses={200: {"model": FixturesListResponse}})
 async def get_fixtures_by_competition(
+    request: Request,
     competition: str,
     limit: Optional[int] = 50,
     offset: Optional[int] = 0,
@@ -460,65 +845,28 @@ async def get_fixtures_by_competition(
     if not parser:
         raise HTTPException(status_code=503, detail="Parser not initialised")
     
+    validators = response_validators(request)
+    not_modified = conditional_response(request, validators)
+    if not_modified:
+        return not_modified
+    
+    cached = response_cache.get(validators["ETag"])
+    if cached:
+        return cached
+    
     try:
-        conn = sqlite3.connect(parser.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        # Build where conditions
-        where_conditions = ["competition = ?"]
-        params = [competition]
-        
-        # By default, only show today and future games (exclude past games)
-        if not include_past:
-            today = datetime.now().strftime("%Y-%m-%d")
-            where_conditions.append("date_parsed >= ?")
-            params.append(today)
-        
-        where_clause = "WHERE " + " AND ".join(where_conditions)
-        
-        # Get total count
-        cursor.execute(f"SELECT COUNT(*) FROM fixtures {where_clause}", params)
-        total_count = cursor.fetchone()[0]
-        
-        if total_count == 0:
-            raise HTTPException(status_code=404, detail="No upcoming fixtures found for this competition")
-        
-        # Get fixtures
-        cursor.execute(f"""
-            SELECT * FROM fixtures 
-            {where_clause}
-            ORDER BY date_parsed ASC, time ASC
-            LIMIT ? OFFSET ?
-        """, params + [limit, offset])
-        
-        fixtures = []
-        for row in cursor.fetchall():
-            fixtures.append(FixtureResponse(
-                id=row['id'],
-                date=row['date'],
-                competition=row['competition'],
-                home_team=row['home_team'],
-                away_team=row['away_team'],
-                time=row['time'],
-                venue=row['venue'],
-                referee=row['referee'],
-                created_at=row['created_at']
-            ))
-        
-        conn.close()
-        
-        return FixturesListResponse(
-            fixtures=fixtures,
-            total_count=total_count,
-            club_id=CLUB_ID,
-            county_board_id=COUNTY_BOARD_ID
+        fixtures, total_count = await _query_fixtures(
+            include_past=include_past, column="competition", value=competition, limit=limit, offset=offset
         )
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    if total_count == 0:
+        raise HTTPException(status_code=404, detail="No upcoming fixtures found for this competition")
+    
+    return fixtures_list_response(validators, fixtures, total_count)
 
-@app.get("/fixtures/{fixture_id}", response_model=FixtureResponse)
+@app.get("/fixtures/{fixture_id}", response_model=None, responses={200: {"model": FixtureResponse}})
 async def get_fixture(fixture_id: int):
     """Get a specific fixture by ID"""
     global parser
@@ -527,29 +875,12 @@ async def get_fixture(fixture_id: int):
         raise HTTPException(status_code=503, detail="Parser not initialised")
     
     try:
-        conn = sqlite3.connect(parser.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        rows = await _fetch_rows(FIXTURE_BY_ID_SQL, (fixture_id,))
         
-        cursor.execute("SELECT * FROM fixtures WHERE id = ?", (fixture_id,))
-        row = cursor.fetchone()
-        
-        if not row:
+        if not rows:
             raise HTTPException(status_code=404, detail="Fixture not found")
         
-        conn.close()
-        
-        return FixtureResponse(
-            id=row['id'],
-            date=row['date'],
-            competition=row['competition'],
-            home_team=row['home_team'],
-            away_team=row['away_team'],
-            time=row['time'],
-            venue=row['venue'],
-            referee=row['referee'],
-            created_at=row['created_at']
-        )
+        return ORJSONResponse(content=dict(zip(FIXTURE_FIELDS, rows[0])))
         
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
@@ -566,35 +897,6 @@ async def refresh_fixtures(background_tasks: BackgroundTasks):
     
     return {"message": "Fixtures refresh triggered"}
 
-def parse_gaa_datetime(date_str: str, time_str: str) -> datetime:
-    """Parse GAA date/time format to datetime object"""
-    try:
-        # Remove ordinal suffixes (st, nd, rd, th)
-        cleaned = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str)
-        
-        # Extract just the date part (remove day name)
-        parts = cleaned.split()
-        if len(parts) >= 4:  # ["Sunday", "15", "Jun", "2025"]
-            date_part = ' '.join(parts[1:])  # "15 Jun 2025"
-        else:
-            date_part = cleaned
-        
-        # Combine date and time
-        full_datetime = f"{date_part} {time_str}"
-        
-        # Parse the datetime
-        return datetime.strptime(full_datetime, "%d %b %Y %H:%M")
-        
-    except Exception as e:
-        # Fallback: use the parsed date from database
-        iso_date = parse_gaa_date(date_str)
-        time_parts = time_str.split(':')
-        hour = int(time_parts[0])
-        minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-        
-        date_obj = datetime.strptime(iso_date, "%Y-%m-%d")
-        return date_obj.replace(hour=hour, minute=minute)
-
 # Remote Calendar endpoint - optimized for Home Assistant remote calendar integration
 
 
@@ -603,5 +905,8 @@ if __name__ == "__main__":
         "api:app",
         host="0.0.0.0",
         port=PORT,
-        reload=False
+        reload=False,
+        loop="uvloop",
+        http="httptools",
+        workers=WORKERS
     )
\ No newline at end of file
@@ -7,23 +7,49 @@ Stores fixtures in SQLite database for caching.
 """
 
 import sqlite3
+import calendar
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import re
 import json
+import functools
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Single INSERT text so sqlite3 prepares it once per save
+INSERT_FIXTURE_SQL = '''
+    INSERT OR IGNORE INTO fixtures 
+    (date, date_parsed, competition, home_team, away_team, time, venue, referee, created_at, start_ts, end_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Distinct venues and competitions, kept alongside fixtures so listing them
+# doesn't scan the fixtures table. Fixtures are never deleted, so neither are these.
+SYNC_VENUES_SQL = "INSERT OR IGNORE INTO venues (name) SELECT DISTINCT venue FROM fixtures WHERE venue != ''"
+SYNC_COMPETITIONS_SQL = "INSERT OR IGNORE INTO competitions (name) SELECT DISTINCT competition FROM fixtures"
+
+# Compiled once; these run for every fixture parsed and saved
+_ORDINAL_RE = re.compile(r'(\d+)(?:st|nd|rd|th)')
+_VENUE_RE = re.compile(r'Venue:\s*([^R]+?)(?:\s+Referee:|$)')
+_REFEREE_RE = re.compile(r'Referee:\s*(.+)')
+_DATE_RE = re.compile(r'\w+\s+(\d+\s+\w+\s+\d+)')  # "Sunday 15 Jun 2025" -> "15 Jun 2025"
+_DATETIME_FMT = "%d %b %Y %H:%M"
+
+# Fixtures don't list an end time, so assume a 2-hour duration
+FIXTURE_DURATION_SECONDS = 2 * 60 * 60
+
+# Fixtures share a handful of date strings, and parsing them is pure
+@functools.lru_cache(maxsize=512)
 def parse_gaa_date(date_str: str) -> str:
     """Parse GAA date format to ISO date string for sorting"""
     try:
         # Remove ordinal suffixes (st, nd, rd, th)
-        cleaned = re.sub(r'(\d+)(st|nd|rd|th)', r'\1', date_str)
+        cleaned = _ORDINAL_RE.sub(r'\1', date_str)
         
         # Parse the date
         parsed_date = datetime.strptime(cleaned, "%A %d %b %Y")
@@ -34,6 +60,41 @@ def parse_gaa_date(date_str: str) -> str:
         logger.warning(f"Could not parse date '{date_str}': {e}")
         return "9999-12-31"  # Put unparseable dates at the end
 
+def parse_gaa_datetime(date_str: str, time_str: str) -> datetime:
+    """Parse GAA date/time format to datetime object"""
+    try:
+        # Remove ordinal suffixes (st, nd, rd, th)
+        cleaned = _ORDINAL_RE.sub(r'\1', date_str)
+        
+        # Extract just the date part (remove day name)
+        match = _DATE_RE.match(cleaned)
+        date_part = match.group(1) if match else cleaned
+        
+        # Parse the combined date and time
+        return datetime.strptime(f"{date_part} {time_str}", _DATETIME_FMT)
+        
+    except Exception as e:
+        # Fallback: use the parsed date
+        iso_date = parse_gaa_date(date_str)
+        time_parts = time_str.split(':')
+        hour = int(time_parts[0])
+        minute = int(time_parts[1]) if len(time_parts) > 1 else 0
+        
+        date_obj = datetime.strptime(iso_date, "%Y-%m-%d")
+        return date_obj.replace(hour=hour, minute=minute)
+
+def fixture_timestamps(date_str: str, time_str: str) -> Tuple[Optional[int], Optional[int]]:
+    """Start and end of a fixture as epoch seconds, or (None, None) if unparseable
+
+    Fixture times are local wall-clock times, so they are encoded with
+    calendar.timegm (i.e. as if they were UTC) and decoded with time.gmtime.
+    """
+    try:
+        start_ts = calendar.timegm(parse_gaa_datetime(date_str, time_str).timetuple())
+    except Exception:
+        return None, None
+    return start_ts, start_ts + FIXTURE_DURATION_SECONDS
+
 @dataclass
 class Fixture:
     """Data class for GAA fixture"""
@@ -44,7 +105,6 @@ class Fixture:
     time: str
     venue: str
     referee: str
-    raw_html: str
     created_at: str
     
     def to_dict(self) -> Dict:
@@ -56,7 +116,6 @@ class Fixture:
             'time': self.time,
             'venue': self.venue,
             'referee': self.referee,
-            'raw_html': self.raw_html,
             'created_at': self.created_at
         }
 
@@ -68,6 +127,19 @@ class GAAFixturesParser:
         self.club_id = club_id
         self.county_board_id = county_board_id
         self.url = f"https://kilkennygaa.ie/fixtures-results/fixtures-results-ajax/?clubID={club_id}&countyBoardID={county_board_id}&fixturesOnly=Y"
+        # Unix time of the last run that fetched and saved fixtures
+        self.last_success_ts: Optional[float] = None
+        
+        # One session for every fetch, so the connection to the site is kept alive
+        self._session = requests.Session()
+        self._session.headers.update({
+            'User-Agent': f'gaa-fixtures-api/1.0 (club {club_id})',
+            'Accept-Encoding': 'gzip, deflate',
+        })
+        # Validators from the last page that was saved, sent back so the site can answer 304
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._fetched_validators = (None, None)
         self.init_database()
     
     def init_database(self):
@@ -75,6 +147,9 @@ class GAAFixturesParser:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # WAL is persistent, and the API's read-only connections can't switch it on themselves
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS fixtures (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -86,21 +161,60 @@ class GAAFixturesParser:
                 time TEXT NOT NULL,
                 venue TEXT NOT NULL,
                 referee TEXT NOT NULL,
-                raw_html TEXT NOT NULL,
                 created_at TEXT NOT NULL,
+                start_ts INTEGER,
+                end_ts INTEGER,
                 UNIQUE(date, competition, home_team, away_team, time)
             )
         ''')
+
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(fixtures)')}
+        
+        # Older databases stored each fixture's HTML fragment, which nothing reads
+        if 'raw_html' in columns:
+            cursor.execute('ALTER TABLE fixtures DROP COLUMN raw_html')
+        
+        # Databases created before start_ts/end_ts existed get the columns added and filled in
+        for column in ('start_ts', 'end_ts'):
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE fixtures ADD COLUMN {column} INTEGER')
+        missing = cursor.execute('SELECT id, date, time FROM fixtures WHERE start_ts IS NULL').fetchall()
+        cursor.executemany(
+            'UPDATE fixtures SET start_ts = ?, end_ts = ? WHERE id = ?',
+            [(*fixture_timestamps(date, time), fixture_id) for fixture_id, date, time in missing]
+        )
         
+        cursor.execute('CREATE TABLE IF NOT EXISTS venues (name TEXT PRIMARY KEY) WITHOUT ROWID')
+        cursor.execute('CREATE TABLE IF NOT EXISTS competitions (name TEXT PRIMARY KEY) WITHOUT ROWID')
+        # Catch up with fixtures saved before the summary tables existed
+        cursor.execute(SYNC_VENUES_SQL)
+        cursor.execute(SYNC_COMPETITIONS_SQL)
+        
+        # Indexes for the API's date and competition filters, so those become range
+        # searches. Plain queries (the calendar) also read rows in ORDER BY order;
+        # the paged lists' COUNT(*) OVER () still sorts its page in a temp b-tree.
+        # Venue filters are substring LIKEs, which no index can serve.
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_fixtures_date ON fixtures(date_parsed, time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_fixtures_comp_date ON fixtures(competition, date_parsed, time)')
+
         conn.commit()
         conn.close()
         logger.info(f"Database initialised at {self.db_path}")
     
-    def fetch_html(self) -> str:
-        """Fetch HTML content from GAA website"""
+    def fetch_html(self) -> Optional[str]:
+        """Fetch HTML content from GAA website, or None if unchanged since the last save"""
+        headers = {}
+        if self._etag:
+            headers['If-None-Match'] = self._etag
+        if self._last_modified:
+            headers['If-Modified-Since'] = self._last_modified
         try:
-            response = requests.get(self.url, timeout=30)
+            response = self._session.get(self.url, headers=headers, timeout=30)
+            if response.status_code == 304:
+                logger.info("Fixtures page not modified since last fetch")
+                return None
             response.raise_for_status()
+            self._fetched_validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
             logger.info("Successfully fetched HTML content")
             return response.text
         except requests.RequestException as e:
@@ -109,7 +223,8 @@ class GAAFixturesParser:
     
     def parse_fixtures(self, html_content: str) -> List[Fixture]:
         """Parse HTML content to extract fixtures"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # lxml's C parser builds the tree far faster than the pure-Python html.parser
+        soup = BeautifulSoup(html_content, 'lxml')
         fixtures = []
         
         # Find all date headers
@@ -171,12 +286,12 @@ class GAAFixturesParser:
                 venue_text = more_info_elem.get_text()
                 
                 # Extract venue
-                venue_match = re.search(r'Venue:\s*([^R]+?)(?:\s+Referee:|$)', venue_text)
+                venue_match = _VENUE_RE.search(venue_text)
                 if venue_match:
                     venue = venue_match.group(1).strip()
                 
                 # Extract referee
-                referee_match = re.search(r'Referee:\s*(.+)', venue_text)
+                referee_match = _REFEREE_RE.search(venue_text)
                 if referee_match:
                     referee = referee_match.group(1).strip()
             
@@ -188,7 +303,6 @@ class GAAFixturesParser:
                 time=time,
                 venue=venue,
                 referee=referee,
-                raw_html=str(competition_div),
                 created_at=datetime.now().isoformat()
             )
             
@@ -199,27 +313,40 @@ class GAAFixturesParser:
     def save_fixtures(self, fixtures: List[Fixture]):
         """Save fixtures to SQLite database"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # WAL lets API readers keep going while we write; NORMAL syncs once per checkpoint
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
         
-        saved_count = 0
-        for fixture in fixtures:
-            try:
-                date_parsed = parse_gaa_date(fixture.date)
-                cursor.execute('''
-                    INSERT OR IGNORE INTO fixtures 
-                    (date, date_parsed, competition, home_team, away_team, time, venue, referee, raw_html, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    fixture.date, date_parsed, fixture.competition, fixture.home_team,
-                    fixture.away_team, fixture.time, fixture.venue,
-                    fixture.referee, fixture.raw_html, fixture.created_at
-                ))
-                if cursor.rowcount > 0:
-                    saved_count += 1
-            except sqlite3.Error as e:
-                logger.error(f"Error saving fixture: {e}")
+        rows = [
+            (
+                fixture.date, parse_gaa_date(fixture.date), fixture.competition, fixture.home_team,
+                fixture.away_team, fixture.time, fixture.venue,
+                fixture.referee, fixture.created_at,
+                *fixture_timestamps(fixture.date, fixture.time)
+            )
+            for fixture in fixtures
+        ]
         
-        conn.commit()
+        # One prepared statement stepped over every row inside a single transaction;
+        # ignored duplicates don't count as changes
+        changes_before = conn.total_changes
+        try:
+            with conn:
+                conn.executemany(INSERT_FIXTURE_SQL, rows)
+                saved_count = conn.total_changes - changes_before
+                # Taken from the stored rows, as ignored duplicates may differ in venue
+                if saved_count:
+                    conn.execute(SYNC_VENUES_SQL)
+                    conn.execute(SYNC_COMPETITIONS_SQL)
+        except sqlite3.Error as e:
+            # Raised so run() doesn't treat the page as saved
+            logger.error(f"Error saving fixtures: {e}")
+            conn.close()
+            raise
+        
+        # Refresh planner statistics so the indexes are chosen as the table grows
+        if saved_count:
+            conn.execute('ANALYZE')
         conn.close()
         logger.info(f"Saved {saved_count} new fixtures to database")
     
@@ -233,7 +360,8 @@ class GAAFixturesParser:
         today = datetime.now().date()
         
         cursor.execute('''
-            SELECT * FROM fixtures 
+            SELECT id, date, competition, home_team, away_team, time, venue, referee, created_at
+            FROM fixtures 
             ORDER BY date ASC
         ''')
         
@@ -250,11 +378,17 @@ class GAAFixturesParser:
             # Fetch HTML
             html_content = self.fetch_html()
             
-            # Parse fixtures
-            fixtures = self.parse_fixtures(html_content)
-            
-            # Save to database
-            self.save_fixtures(fixtures)
+            # Nothing to parse or save if the page hasn't changed
+            if html_content is not None:
+                # Parse fixtures
+                fixtures = self.parse_fixtures(html_content)
+                
+                # Save to database
+                self.save_fixtures(fixtures)
+                
+                # Only ask for a 304 against a page whose fixtures have been saved
+                self._etag, self._last_modified = self._fetched_validators
+            self.last_success_ts = datetime.now().timestamp()
             
             # Get upcoming fixtures
             upcoming = self.get_upcoming_fixtures()
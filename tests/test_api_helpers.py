@@ -0,0 +1,89 @@
+"""Tests for the paging and conditional-request helpers behind the list endpoints"""
+
+import sqlite3
+from email.utils import formatdate
+
+import pytest
+from starlette.requests import Request
+
+from api import conditional_response, fixture_filter, _fetch_page
+from gaa_fixtures_parser import Fixture, GAAFixturesParser
+
+ETAG = '"0123456789abcdef"'
+LAST_MODIFIED = formatdate(1_750_000_000, usegmt=True)
+VALIDATORS = {"ETag": ETAG, "Last-Modified": LAST_MODIFIED}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """A throwaway database holding two fixtures at the same venue"""
+    db_path = str(tmp_path / "fixtures.db")
+    parser = GAAFixturesParser(db_path=db_path)
+    parser.save_fixtures([
+        Fixture("Saturday 1st Nov 2031", "Minor Hurling League", "Tullogher", "Mullinavat",
+                "11:30", "Tullogher", "J. Smith", "2025-01-01T00:00:00"),
+        Fixture("Sunday 2nd Nov 2031", "Junior Football League", "Tullogher", "Glenmore",
+                "12:30", "Tullogher", "J. Smith", "2025-01-01T00:00:00"),
+    ])
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def venue_page(conn, limit, offset):
+    key, params = fixture_filter(True, "venue", "Tullogher")
+    return _fetch_page(conn, key, params, limit, offset)
+
+
+def test_page_carries_window_count(conn):
+    rows, total_count = venue_page(conn, 1, 0)
+    assert len(rows) == 1
+    assert total_count == 2
+
+
+def test_limit_zero_still_counts(conn):
+    assert venue_page(conn, 0, 0) == ([], 2)
+
+
+def test_offset_past_end_still_counts(conn):
+    assert venue_page(conn, 10, 5) == ([], 2)
+
+
+def request_with(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/fixtures",
+        "query_string": b"",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.mark.parametrize("if_none_match", [ETAG, '"other", ' + ETAG, "*"])
+def test_matching_etag_is_not_modified(if_none_match):
+    response = conditional_response(request_with(if_none_match=if_none_match), VALIDATORS)
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
+
+
+def test_stale_etag_is_served():
+    assert conditional_response(request_with(if_none_match='"other"'), VALIDATORS) is None
+
+
+def test_if_modified_since_current_copy_is_not_modified():
+    response = conditional_response(request_with(if_modified_since=LAST_MODIFIED), VALIDATORS)
+    assert response.status_code == 304
+
+
+def test_if_modified_since_older_copy_is_served():
+    older = formatdate(1_700_000_000, usegmt=True)
+    assert conditional_response(request_with(if_modified_since=older), VALIDATORS) is None
+
+
+def test_etag_takes_precedence_over_if_modified_since():
+    request = request_with(if_none_match='"other"', if_modified_since=LAST_MODIFIED)
+    assert conditional_response(request, VALIDATORS) is None
+
+
+def test_no_validators_is_served():
+    assert conditional_response(request_with(), VALIDATORS) is None
@@ -0,0 +1,146 @@
+"""Tests for the hand-written iCal output, checked against the icalendar library"""
+
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from icalendar import Calendar, Event, vText
+
+from api import CALENDAR_FIELDS, CLUB_ID, build_calendar, _ical_text
+from gaa_fixtures_parser import fixture_timestamps, parse_gaa_datetime
+
+DATE = "Sunday 15th Jun 2025"
+TIME = "14:00"
+CREATED_AT = "2025-06-01T10:11:12.123456"
+LONG_VENUE = "Páirc Uí Chaoimh, Corcaigh; 🏟️ " * 4
+
+# Render-time stamps differ between renders, so only their value is masked
+STAMP_RE = re.compile(r"^(DTSTAMP|LAST-MODIFIED):\d{8}T\d{6}")
+
+
+def fixture_row(
+    fixture_id=1,
+    competition="Minor Hurling League, Div 1; A\\B",
+    home_team="Tullogher",
+    away_team="Mullinavat",
+    venue="Tullogher",
+    referee="J. Smith",
+    date=DATE,
+    time=TIME,
+):
+    """A calendar row as CALENDAR_SQL returns it"""
+    start_ts, end_ts = fixture_timestamps(date, time)
+    row = dict(
+        id=fixture_id,
+        competition=competition,
+        home_team=home_team,
+        away_team=away_team,
+        venue=venue,
+        referee=referee,
+        created_at=CREATED_AT,
+        start_ts=start_ts,
+        end_ts=end_ts,
+    )
+    return tuple(row[field] for field in CALENDAR_FIELDS)
+
+
+def icalendar_event(row, date=DATE, time=TIME) -> Event:
+    """The event the icalendar-based renderer used to build for the same row"""
+    fixture = dict(zip(CALENDAR_FIELDS, row))
+    event = Event()
+    event.add('summary', f"{fixture['home_team']} v {fixture['away_team']}")
+    event.add('description', '\n'.join([
+        f"Competition: {fixture['competition']}",
+        f"Venue: {fixture['venue']}",
+        f"Referee: {fixture['referee']}",
+    ]))
+    event.add('location', fixture['venue'])
+    start_dt = parse_gaa_datetime(date, time)
+    event.add('dtstart', start_dt)
+    event.add('dtend', start_dt + timedelta(hours=2))
+    event.add('uid', f"gaa-fixture-{fixture['id']}@club-{CLUB_ID}.gaa")
+    event.add('created', datetime.fromisoformat(fixture['created_at']))
+    event.add('categories', ['GAA', 'Hurling', 'Football', fixture['competition'].split()[0]])
+    now = datetime.now()
+    event.add('dtstamp', now)
+    event.add('last-modified', now)
+    return event
+
+
+def content_lines(ical: bytes) -> list:
+    """Unfolded content lines, with the render-time stamps' values masked"""
+    unfolded = ical.decode().replace("\r\n ", "")
+    return sorted(STAMP_RE.sub(r"\1:<stamp>", line) for line in unfolded.split("\r\n") if line)
+
+
+def vevent_lines(body: bytes) -> bytes:
+    start = body.index(b"BEGIN:VEVENT")
+    end = body.index(b"END:VEVENT") + len(b"END:VEVENT\r\n")
+    return body[start:end]
+
+
+@pytest.mark.parametrize("value", [
+    "plain",
+    "comma, semicolon; backslash \\ done",
+    "line one\nline two",
+    "line one\r\nline two",
+    "\\n is not a newline",
+])
+def test_text_escaping_matches_icalendar(value):
+    assert _ical_text(value) == vText(value).to_ical().decode()
+
+
+@pytest.mark.parametrize("venue", ["Tullogher", LONG_VENUE])
+def test_event_matches_icalendar(venue):
+    row = fixture_row(venue=venue)
+    body = build_calendar([row])
+    assert content_lines(vevent_lines(body)) == content_lines(icalendar_event(row).to_ical())
+
+
+def test_render_stamps_are_utc():
+    body = build_calendar([fixture_row()])
+    stamps = re.findall(rb"^(?:DTSTAMP|LAST-MODIFIED):(\S+)\r$", body, re.MULTILINE)
+    assert len(stamps) == 2
+    for stamp in stamps:
+        assert re.fullmatch(rb"\d{8}T\d{6}Z", stamp)
+
+
+def test_long_multibyte_lines_fold_at_75_octets():
+    body = build_calendar([fixture_row(venue=LONG_VENUE)])
+
+    lines = body.split(b"\r\n")
+    assert any(line.startswith(b" ") for line in lines)
+    for line in lines:
+        assert len(line) <= 75
+        line.decode("utf-8")  # folds never split a multi-byte character
+
+    event = Calendar.from_ical(body).walk("VEVENT")[0]
+    assert str(event["LOCATION"]) == LONG_VENUE
+    assert LONG_VENUE in str(event["DESCRIPTION"])
+
+
+def test_text_round_trips_through_icalendar():
+    row = fixture_row()
+    event = Calendar.from_ical(build_calendar([row])).walk("VEVENT")[0]
+
+    assert str(event["SUMMARY"]) == "Tullogher v Mullinavat"
+    assert str(event["DESCRIPTION"]) == (
+        "Competition: Minor Hurling League, Div 1; A\\B\n"
+        "Venue: Tullogher\n"
+        "Referee: J. Smith"
+    )
+    assert event.decoded("DTSTART") == datetime(2025, 6, 15, 14, 0)
+    assert event.decoded("DTEND") == datetime(2025, 6, 15, 16, 0)
+
+
+def test_unparseable_time_is_skipped():
+    rows = [fixture_row(fixture_id=1, time="TBC"), fixture_row(fixture_id=2)]
+    assert rows[0][CALENDAR_FIELDS.index("start_ts")] is None
+
+    events = Calendar.from_ical(build_calendar(rows)).walk("VEVENT")
+    assert [str(event["UID"]) for event in events] == [f"gaa-fixture-2@club-{CLUB_ID}.gaa"]
+
+
+def test_empty_competition_leaves_out_its_category():
+    body = build_calendar([fixture_row(competition="")])
+    assert b"CATEGORIES:GAA,Hurling,Football\r\n" in body